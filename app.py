@@ -7,10 +7,11 @@ import numpy as np
 
 # Import our custom modules
 from utils.google_sheets import get_google_sheets_data
-from utils.data_processor import process_chess_data, calculate_statistics, get_opening_stats
+from utils.data_processor import (process_chess_data, calculate_statistics, get_opening_stats,
+                                  load_processed_cache, save_processed_cache, split_pgn, opponent_mask)
 from utils.ml_analysis import generate_performance_insights
 from components.charts import (create_rating_progression, create_win_loss_pie,
-                             create_performance_charts, create_opening_bar)
+                             create_metric_over_time, create_opening_bar)
 from components.filters import create_filters, apply_filters
 from components.opening_explorer import create_opening_explorer
 from utils.debug import debug_data_loading
@@ -81,18 +82,35 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load and process data
-@st.cache_data(ttl=600)  # Cache data for 10 minutes
+DATA_TTL = 300  # Cache data for 5 minutes; refreshes are cheap ETag revalidations
+
+@st.cache_data(ttl=DATA_TTL)
 def load_data():
+    """Return the lean games frame and the PGN text as a separate Series keyed by game"""
+    # A recently processed frame on disk survives server restarts
+    df = load_processed_cache(max_age=DATA_TTL)
+    if df is not None:
+        return split_pgn(df)
+
     df = get_google_sheets_data()
     if df is not None:
-        return process_chess_data(df)
-    return None
+        df = process_chess_data(df)
+        if df is not None:
+            save_processed_cache(df)
+        return split_pgn(df)
+    return None, None
+
+# Insight display style keyed on the leading emoji character (anything else is a success)
+INSIGHT_STYLES = {e[0]: st.info for e in ('📈', '📊', '🎯', '⚖️')}
+INSIGHT_STYLES.update({e[0]: st.warning for e in ('⚔️', '🧮', '🏰')})
+# Leading emoji characters of insights that are also shown as tips
+TIP_PREFIXES = frozenset(e[0] for e in ('🎯', '⚔️', '🧮', '🏰', '🧘‍♂️', '⏰', '🌟'))
 
 # Main app
 def main():
     # Load data
     with st.spinner('Fetching chess data from Google Sheets...'):
-        df = load_data()
+        df, pgn_series = load_data()
 
     if df is None:
         st.error("Failed to load chess data. Please check the connection and try again.")
@@ -115,48 +133,56 @@ def main():
         with col3:
             st.metric("Win Percentage", f"{stats['win_percentage']:.1f}%")
         with col4:
-            avg_accuracy = filtered_df['Accuracy %'].mean() if 'Accuracy %' in filtered_df.columns else 0
+            # The processed schema always carries 'Accuracy %'; average the raw array directly
+            accuracy = filtered_df['Accuracy %'].to_numpy(dtype=float)
+            avg_accuracy = np.nanmean(accuracy) if not np.isnan(accuracy).all() else 0
             st.metric("Avg Accuracy", f"{avg_accuracy:.1f}%")
 
-    # Create performance metric charts with side filtering
+    # Performance metric charts with side filtering; each figure is built inside its own tab
     st.subheader("Performance Metrics")
-    performance_charts = create_performance_charts(filtered_df, filters['side_filter'])
+    side_filter = filters['side_filter']
 
     # Display charts in tabs
     tab1, tab2 = st.tabs(["Rating", "Results"])
 
     with tab1:
-        st.plotly_chart(create_rating_progression(filtered_df, filters['side_filter']), use_container_width=True)
+        st.plotly_chart(create_rating_progression(filtered_df, side_filter), use_container_width=True)
 
     with tab2:
-        st.plotly_chart(create_win_loss_pie(filtered_df, filters['side_filter']), use_container_width=True)
+        st.plotly_chart(create_win_loss_pie(filtered_df, side_filter), use_container_width=True)
     
     # Accuracy metrics section
     st.subheader("Accuracy Metrics")
     accuracy_tab, acl_tab = st.tabs(["Accuracy %", "ACL"])
     
     with accuracy_tab:
-        st.plotly_chart(performance_charts['accuracy'], use_container_width=True)
+        st.plotly_chart(create_metric_over_time(filtered_df, 'Accuracy %', 'Accuracy % Over Time',
+                                                'Accuracy %', side_filter), use_container_width=True)
     
     with acl_tab:
-        st.plotly_chart(performance_charts['acl'], use_container_width=True)
+        st.plotly_chart(create_metric_over_time(filtered_df, 'ACL', 'ACL Over Time',
+                                                'ACL', side_filter), use_container_width=True)
         
     # Game ratings section
     st.subheader("Rating Metrics")
     game_tab, perf_tab = st.tabs(["Game Rating", "Performance Rating"])
     
     with game_tab:
-        st.plotly_chart(performance_charts['game_rating'], use_container_width=True)
+        st.plotly_chart(create_metric_over_time(filtered_df, 'Game Rating', 'Game Rating Over Time',
+                                                'Game ELO', side_filter), use_container_width=True)
         
     with perf_tab:
-        st.plotly_chart(performance_charts['performance_rating'], use_container_width=True)
+        st.plotly_chart(create_metric_over_time(filtered_df, 'Performance Rating', 'Performance Rating Over Time',
+                                                'Performance Rating', side_filter), use_container_width=True)
 
     # Opening Analysis section
-    if 'PGN' in filtered_df.columns:
+    if pgn_series is not None:
         with st.expander("Opening Analysis", expanded=False):
+            # Attach PGN text to the filtered games only for the opening views
+            opening_input = filtered_df.join(pgn_series)
             # Debug data loading
-            debug_data_loading(filtered_df)
-            create_opening_explorer(filtered_df)
+            debug_data_loading(opening_input)
+            create_opening_explorer(opening_input)
 
     # ML-based Analysis Section
     if len(filtered_df) >= 5:  # Only show ML analysis if we have enough games
@@ -164,25 +190,25 @@ def main():
             with st.spinner("Generating AI insights..."):
                 insights = generate_performance_insights(filtered_df)
 
+                # Classify each insight once by its leading emoji for both the Insights and Tips tabs
+                styled_insights = []
+                recommendations = []
+                for insight in insights['text_insights']:
+                    lead = insight[:1]
+                    styled_insights.append((INSIGHT_STYLES.get(lead, st.success), insight))
+                    if lead in TIP_PREFIXES:
+                        recommendations.append(insight)
+
                 tab1, tab2, tab3 = st.tabs(["Insights", "Analysis", "Tips"])
 
                 with tab1:
-                    for insight in insights['text_insights']:
-                        if insight.startswith(('📈', '📊', '🎯', '⚖️')):
-                            st.info(insight)
-                        elif insight.startswith(('⚔️', '🧮', '🏰')):
-                            st.warning(insight)
-                        else:
-                            st.success(insight)
+                    for show, insight in styled_insights:
+                        show(insight)
 
                 with tab2:
                     st.dataframe(insights['performance_clusters'], use_container_width=True)
 
                 with tab3:
-                    recommendations = [
-                        insight for insight in insights['text_insights'] 
-                        if any(insight.startswith(emoji) for emoji in ['🎯', '⚔️', '🧮', '🏰', '🧘‍♂️', '⏰', '🌟'])
-                    ]
                     for rec in recommendations:
                         st.success(rec)
     else:
@@ -191,53 +217,39 @@ def main():
     # Display raw data table - show all games, reverse order, and hide # column and sparkline data
     with st.expander("Game History", expanded=False):
         if len(filtered_df) > 0:
-            # Create a copy of the dataframe to avoid modifying the original
-            display_df = filtered_df.copy()
-            
-            # Drop the # column, sparkline data column, and RESULT column since we don't need to show them
-            columns_to_drop = []
-            if '#' in display_df.columns:
-                columns_to_drop.append('#')
-            if 'sparkline data' in display_df.columns:
-                columns_to_drop.append('sparkline data')
-            if 'RESULT' in display_df.columns:
-                columns_to_drop.append('RESULT')
-            if 'Performance Rating' in display_df.columns:
-                columns_to_drop.append('Performance Rating')
-            if 'New Rating' in display_df.columns:
-                columns_to_drop.append('New Rating')
-            if 'Game Rating' in display_df.columns:
-                columns_to_drop.append('Game Rating')
-            # Also hide PGN column from game history as it's large
-            if 'PGN' in display_df.columns:
-                columns_to_drop.append('PGN')
-            
-            if columns_to_drop:
-                display_df = display_df.drop(columns=columns_to_drop)
-            
-            # Format the date to show only the date part (no time)
-            display_df['Date'] = display_df['Date'].dt.date
-            
-            # Sort by Date in descending order (most recent first)
-            display_df = display_df.sort_values('Date', ascending=False)
-            
-            # Reorder columns as requested: Date, Side, Result, ACL, Accuracy %, Opponent Name, Opp. ELO
-            column_order = ['Date', 'Side', 'Result', 'ACL', 'Accuracy %', 'Opponent Name', 'Opp. ELO']
-            display_df = display_df[column_order]
-            
             # Add opponent search functionality
             st.subheader("Search by Opponent")
             opponent_search = st.text_input("Enter opponent name to search", "", key="opponent_search")
             
-            # Always filter by opponent name (even if empty string)
-            # When empty, it will match all names (no filtering)
-            # Case-insensitive search using .str.contains()
+            # Case-insensitive substring search over the distinct opponent names
+            # When empty, no filtering is applied
+            history_df = filtered_df
             if opponent_search:
-                display_df = display_df[display_df['Opponent Name'].str.lower().str.contains(opponent_search.lower())]
-                st.write(f"Found {len(display_df)} games against opponents matching '{opponent_search}'")
+                history_df = filtered_df[opponent_mask(filtered_df['Opponent Name'], opponent_search)]
+                st.write(f"Found {len(history_df)} games against opponents matching '{opponent_search}'")
+            
+            # Select only the displayed columns: Date, Side, Result, ACL, Accuracy %, Opponent Name, Opp. ELO
+            # (this leaves out the rating columns)
+            column_order = ['Date_only', 'Side', 'Result', 'ACL', 'Accuracy %', 'Opponent Name', 'Opp. ELO']
+            display_df = history_df[column_order]
+            
+            # Sort by Date in descending order (most recent first) and show the date part only
+            display_df = display_df.sort_values('Date_only', ascending=False)
+            display_df = display_df.rename(columns={'Date_only': 'Date'})
+            # Result is lowercased at load; title-case the categories (not every row) for display
+            display_df['Result'] = display_df['Result'].cat.rename_categories(str.title)
+            
+            # Cap the rows sent to the browser and hand them over as Arrow-backed columns
+            max_rows = st.number_input("Rows to show", min_value=1, value=100, step=50, key="history_rows")
+            if len(display_df) > max_rows:
+                st.caption(f"Showing the {max_rows} most recent of {len(display_df)} games")
+            display_df = display_df.head(int(max_rows)).convert_dtypes(dtype_backend='pyarrow')
             
-            # Show all games at once
-            st.dataframe(display_df, use_container_width=True)
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                column_config={'Date': st.column_config.DateColumn('Date')}
+            )
 
 if __name__ == "__main__":
     main()
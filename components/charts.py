@@ -6,34 +6,78 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 import numpy as np
+import streamlit as st
+from scipy.interpolate import make_interp_spline
+
+# Interpolated points per gap between games on the smoothed lines
+SPLINE_POINTS = 4
+
+def _smooth(dates, y):
+    """Cubic spline through y over game index, sampled on a fixed grid with dates interpolated to match"""
+    n = len(y)
+    if n < 3:
+        return dates, y
+    t = np.arange(n)
+    grid = np.linspace(0, n - 1, (n - 1) * SPLINE_POINTS + 1)
+    y_smooth = make_interp_spline(t, y, k=min(3, n - 1))(grid)
+    ns = dates.astype('datetime64[ns]').astype('int64')
+    dates_smooth = np.interp(grid, t, ns).astype('int64').astype('datetime64[ns]')
+    return dates_smooth, y_smooth
+
+def _add_series(fig, dates, y, name):
+    """Add a WebGL spline line (no hover) plus the actual points as markers under one legend entry"""
+    line_x, line_y = _smooth(dates, y)
+    fig.add_trace(go.Scattergl(
+        x=line_x,
+        y=line_y,
+        mode='lines',
+        name=name,
+        legendgroup=name,
+        hoverinfo='skip',
+        line=dict(color='#4CAF50')
+    ))
+    fig.add_trace(go.Scattergl(
+        x=dates,
+        y=y,
+        mode='markers',
+        name=name,
+        legendgroup=name,
+        showlegend=False,
+        marker=dict(size=4, color='#4CAF50')  # Smaller markers for mobile
+    ))
+
+def _linfit(y):
+    """Closed-form least-squares line through y over x = 0..n-1, evaluated at each x"""
+    x = np.arange(len(y))
+    x_mean = x.mean()
+    y_mean = y.mean()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / ((x - x_mean) ** 2).sum()
+    return slope * x + (y_mean - slope * x_mean)
 
 def create_rating_progression(df, side_filter="Both"):
     """Create rating progression chart with side awareness"""
+    # Only the plotted columns are hashed for the figure cache
+    return _build_rating_fig(df[['Date', 'New Rating']], side_filter)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _build_rating_fig(rating_df, side_filter):
+    """Build the rating progression figure, memoized on its input columns"""
     # Filter out rows where New Rating is NaN for the chart
-    rating_df = df[df['New Rating'].notna()].copy()
+    rating_df = rating_df[rating_df['New Rating'].notna()]
 
     # Create base figure
     fig = go.Figure()
 
-    # Add main line
-    fig.add_trace(go.Scatter(
-        x=rating_df['Date'],
-        y=rating_df['New Rating'],
-        mode='lines+markers',
-        name='Rating',
-        line=dict(color='#4CAF50', shape='spline'),
-        marker=dict(size=4)
-    ))
+    # Add main line, smoothed server-side since WebGL traces have no spline shape
+    dates = rating_df['Date'].to_numpy()
+    ratings = rating_df['New Rating'].to_numpy(dtype=float)
+    _add_series(fig, dates, ratings, 'Rating')
 
     # Add linear trendline
     if len(rating_df) > 1:
-        x_numeric = np.arange(len(rating_df))
-        z = np.polyfit(x_numeric, rating_df['New Rating'], 1)
-        p = np.poly1d(z)
-
-        fig.add_trace(go.Scatter(
-            x=rating_df['Date'],
-            y=p(x_numeric),
+        fig.add_trace(go.Scattergl(
+            x=dates,
+            y=_linfit(ratings),
             mode='lines',
             name='Trend',
             line=dict(color='#FF4B4B', width=2, dash='dash'),
@@ -65,13 +109,16 @@ def create_rating_progression(df, side_filter="Both"):
 
 def create_win_loss_pie(df, side_filter="Both"):
     """Create win/loss distribution pie chart with side awareness"""
-    # Count results with case-insensitive matching
-    # Use 'RESULT' column instead of 'Result'
-    result_counts = df['RESULT'].str.lower().value_counts()
-    wins = result_counts.get('win', 0)
-    losses = result_counts.get('loss', 0)
-    draws = result_counts.get('draw', 0)
+    # Result is normalized at load with win/loss/draw as its first three categories,
+    # so count those codes (missing and other results are left out)
+    codes = df['Result'].cat.codes.to_numpy()
+    wins, losses, draws = (int(n) for n in np.bincount(codes[(codes >= 0) & (codes < 3)], minlength=3))
     
+    return _build_win_loss_fig(wins, losses, draws, side_filter)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _build_win_loss_fig(wins, losses, draws, side_filter):
+    """Build the win/loss pie, memoized on the three result counts"""
     total = sum([wins, losses, draws])
     
     # Calculate percentages
@@ -137,31 +184,28 @@ def create_win_loss_pie(df, side_filter="Both"):
 
 def create_metric_over_time(df, metric_col, title, y_label, side_filter="Both"):
     """Create line chart for metrics over time with side awareness"""
+    # Only the plotted columns are hashed for the figure cache
+    return _build_metric_fig(df[['Date', metric_col]], metric_col, title, side_filter)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _build_metric_fig(metric_df, metric_col, title, side_filter):
+    """Build a metric-over-time figure, memoized on its input columns"""
     # Filter out rows where metric is NaN
-    metric_df = df[df[metric_col].notna()].copy()
+    metric_df = metric_df[metric_df[metric_col].notna()]
 
     # Create base line plot
     fig = go.Figure()
 
-    # Add main line
-    fig.add_trace(go.Scatter(
-        x=metric_df['Date'],
-        y=metric_df[metric_col],
-        mode='lines+markers',
-        name='Actual',
-        line=dict(color='#4CAF50', shape='spline'),
-        marker=dict(size=4)  # Smaller markers for mobile
-    ))
+    # Add main line, smoothed server-side since WebGL traces have no spline shape
+    dates = metric_df['Date'].to_numpy()
+    values = metric_df[metric_col].to_numpy(dtype=float)
+    _add_series(fig, dates, values, 'Actual')
 
     # Add linear trendline
     if len(metric_df) > 1:
-        x_numeric = np.arange(len(metric_df))
-        z = np.polyfit(x_numeric, metric_df[metric_col], 1)
-        p = np.poly1d(z)
-
-        fig.add_trace(go.Scatter(
-            x=metric_df['Date'],
-            y=p(x_numeric),
+        fig.add_trace(go.Scattergl(
+            x=dates,
+            y=_linfit(values),
             mode='lines',
             name='Trend',
             line=dict(color='#FF4B4B', width=2, dash='dash'),
@@ -192,36 +236,6 @@ def create_metric_over_time(df, metric_col, title, y_label, side_filter="Both"):
     )
     return fig
 
-def create_performance_charts(df, side_filter="Both"):
-    """Create all performance metric charts with side filter"""
-    charts = {
-        'acl': create_metric_over_time(
-            df, 'ACL',
-            'ACL Over Time',
-            'ACL',
-            side_filter
-        ),
-        'accuracy': create_metric_over_time(
-            df, 'Accuracy %',
-            'Accuracy % Over Time',
-            'Accuracy %',
-            side_filter
-        ),
-        'game_rating': create_metric_over_time(
-            df, 'Game Rating',
-            'Game Rating Over Time',
-            'Game ELO',
-            side_filter
-        ),
-        'performance_rating': create_metric_over_time(
-            df, 'Performance Rating',
-            'Performance Rating Over Time',
-            'Performance Rating',
-            side_filter
-        )
-    }
-    return charts
-
 def create_opening_bar(opening_stats):
     """Create opening statistics bar chart"""
     if not opening_stats.empty:
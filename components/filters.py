@@ -2,6 +2,7 @@
 Filter components for Chess Analytics Dashboard
 """
 
+import numpy as np
 import streamlit as st
 
 def create_filters(df):
@@ -57,30 +58,32 @@ def create_filters(df):
 
 def apply_filters(df, filters):
     """Apply selected filters to the dataframe"""
-    filtered_df = df.copy()  # Start with a copy of all data
+    # Combine every filter into a single boolean mask and index the frame once
+    mask = np.ones(len(df), dtype=bool)
 
     # Apply date filter only to rows with valid dates
     if filters['date_range']:
-        date_mask = df['Date'].isna() | (
-            (df['Date'].dt.date >= filters['date_range'][0]) &
-            (df['Date'].dt.date <= filters['date_range'][1])
-        )
-        filtered_df = filtered_df[date_mask]
+        # Date_only holds midnight timestamps (pandas keeps it as datetime64[s]); cast the two
+        # bounds to the column's own unit so the column is compared without conversion
+        d_arr = df['Date_only'].to_numpy()
+        lo = np.datetime64(filters['date_range'][0], 'D').astype(d_arr.dtype)
+        hi = np.datetime64(filters['date_range'][1], 'D').astype(d_arr.dtype)
+        mask &= np.isnat(d_arr) | ((d_arr >= lo) & (d_arr <= hi))
 
     # Apply rating filter only to rows with valid ratings
     if filters['rating_range']:
-        rating_mask = df['New Rating'].isna() | (
-            df['New Rating'].between(filters['rating_range'][0], filters['rating_range'][1])
+        ratings = df['New Rating'].to_numpy()
+        mask &= np.isnan(ratings) | (
+            (ratings >= filters['rating_range'][0]) & (ratings <= filters['rating_range'][1])
         )
-        filtered_df = filtered_df[rating_mask]
         
     # Apply side filter (White/Black)
     if filters['side_filter'] != "Both":
-        # Handle various formats of side data (W/WHITE/White or B/BLACK/Black)
+        # Side is normalized to W/B at load time, so this is a category code compare
         if filters['side_filter'] == "White":
-            side_mask = df['Side'].str.upper().isin(['W', 'WHITE'])
+            side_mask = df['Side'] == 'W'
         else:  # Black
-            side_mask = df['Side'].str.upper().isin(['B', 'BLACK'])
-        filtered_df = filtered_df[side_mask]
+            side_mask = df['Side'] == 'B'
+        mask &= side_mask.to_numpy()
 
-    return filtered_df  # Return a copy to avoid SettingWithCopyWarning
+    return df.iloc[np.flatnonzero(mask)]  # Positional take returns a new frame
@@ -28,9 +28,13 @@ def create_game_analyzer(df):
     with col2:
         st.subheader("Performance by Side")
         if 'Side' in df.columns and 'Result' in df.columns:
-            side_stats = df.groupby('Side')['Result'].apply(
-                lambda x: (x.str.lower() == 'win').sum() / len(x) * 100
-            )
+            # Win rate per side from boolean masks (Side and Result are normalized at load)
+            is_win = (df['Result'] == 'win').to_numpy(dtype=bool)
+            side = df['Side'].to_numpy()
+            side_stats = pd.Series({
+                code: is_win[side == code].mean() * 100
+                for code in ('W', 'B') if (side == code).any()
+            })
             fig = px.bar(x=side_stats.index, y=side_stats.values, title="Win Rate by Side")
             st.plotly_chart(fig, use_container_width=True)
     
@@ -8,166 +8,166 @@ import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
 import re
-import chess.pgn
-import io
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from utils.data_processor import frame_fingerprint
+from utils.pgn_analyzer import strip_to_mainline
+
+# Most-played openings sent to the hierarchy charts
+MAX_CHART_OPENINGS = 50
+
+# Opening/Variation header tags, matched by Arrow's RE2 engine (captured as field 'v')
+_OP_PATTERN = r'\[Opening\s+"(?P<v>[^"]+)"\]'
+_VAR_PATTERN = r'\[Variation\s+"(?P<v>[^"]+)"\]'
+
+# First move and reply in PGN movetext, e.g. '1. e4 e5' or '1. d4 1... Nf6'
+_FIRST_MOVES_RE = re.compile(r'(?:^|\s)1\.\s*([^\s.!?]+)[!?]*(?:\s+(?:1\.\.\.\s*)?([^\s.!?]+))?')
+
+# Simple opening classification for games without an Opening tag
+_MOVE_PAIR_OPENINGS = {
+    'e4 e5': "Open Game",
+    'e4 c5': "Sicilian Defense",
+    'd4 d5': "Closed Game",
+    'd4 Nf6': "Indian Defense"
+}
+_FIRST_MOVE_OPENINGS = {
+    'e4': "King's Pawn Game",
+    'd4': "Queen's Pawn Game",
+    'c4': "English Opening",
+    'Nf3': "Reti Opening"
+}
+
+def _extract_tag(pgn, pattern):
+    """Capture one header tag for every game in native code (missing where the tag is absent)"""
+    matches = pc.extract_regex(pa.array(pgn.to_numpy(dtype=object), type=pa.string()), pattern)
+    values = pc.struct_field(matches, 'v').to_numpy(zero_copy_only=False)
+    return pd.Series(values, index=pgn.index, dtype=object)
+
+def _classify_by_moves(pgn):
+    """Classify untagged games from their first move and reply"""
+    # Read the first move pair from the mainline only
+    moves = strip_to_mainline(pgn).str.extract(_FIRST_MOVES_RE)
+    first, reply = moves[0], moves[1]
+    
+    # Known move pairs first, then the first move alone
+    opening = (first + ' ' + reply).map(_MOVE_PAIR_OPENINGS)
+    opening = opening.fillna(first.map(_FIRST_MOVE_OPENINGS))
+    opening = opening.fillna("Other Opening")
+    
+    # Games without any moves keep the generic label
+    opening[first.isna()] = "Standard Opening"
+    return opening
+
+@st.cache_data(show_spinner=False,
+               hash_funcs={pd.DataFrame: lambda d: frame_fingerprint(d, ['PGN', 'Result', 'Side'])})
 def extract_opening_data(df):
     """Extract opening information from PGN data"""
     if df is None or 'PGN' not in df.columns:
         return pd.DataFrame()
     
-    openings = []
-    variations = []
-    results = []
-    sides = []
-    
-    for idx, row in df.iterrows():
-        pgn = row.get('PGN', '')
-        if pd.isna(pgn) or not pgn:
-            continue
-            
-        # Try to extract opening from PGN headers first
-        opening_match = re.search(r'\[Opening\s+"([^"]+)"\]', pgn)
-        variation_match = re.search(r'\[Variation\s+"([^"]+)"\]', pgn)
-        
-        if opening_match:
-            opening = opening_match.group(1)
-            variation = variation_match.group(1) if variation_match else "Main Line"
-        else:
-            # If no opening tags, try to extract from game analysis
-            # For now, use a generic approach based on first few moves
-            opening = "Standard Opening"
-            variation = "Main Line"
-            
-            # Try to extract some basic opening info from the game
-            try:
-                game = chess.pgn.read_game(io.StringIO(pgn))
-                if game:
-                    # Get the first few moves to identify opening
-                    moves = []
-                    board = game.board()
-                    for move in game.mainline_moves():
-                        moves.append(board.san(move))
-                        if len(moves) >= 4:  # Look at first 4 moves
-                            break
-                        board.push(move)
-                    
-                    if moves:
-                        # Simple opening classification based on first moves
-                        if moves[0] == 'e4':
-                            if len(moves) > 1 and moves[1] == 'e5':
-                                opening = "Open Game"
-                            elif len(moves) > 1 and moves[1] == 'c5':
-                                opening = "Sicilian Defense"
-                            else:
-                                opening = "King's Pawn Game"
-                        elif moves[0] == 'd4':
-                            if len(moves) > 1 and moves[1] == 'd5':
-                                opening = "Closed Game"
-                            elif len(moves) > 1 and moves[1] == 'Nf6':
-                                opening = "Indian Defense"
-                            else:
-                                opening = "Queen's Pawn Game"
-                        elif moves[0] == 'c4':
-                            opening = "English Opening"
-                        elif moves[0] == 'Nf3':
-                            opening = "Reti Opening"
-                        else:
-                            opening = "Other Opening"
-            except:
-                opening = "Unknown Opening"
-                variation = "Main Line"
-        
-        # Get result and side
-        result = row.get('Result', 'Unknown')
-        side = row.get('Side', 'Unknown')
-        
-        openings.append(opening)
-        variations.append(variation)
-        results.append(result)
-        sides.append(side)
-    
-    # Create dataframe with opening data
+    # Only games with PGN text
+    pgn = df['PGN'].dropna().astype(str)
+    pgn = pgn[pgn.str.len() > 0]
+    
+    # Pull the opening tags from PGN headers in one native pass per tag, skipping the regex
+    # entirely when no game carries an Opening tag (common for raw site exports)
+    if pgn.str.contains('[Opening', regex=False).any():
+        openings = _extract_tag(pgn, _OP_PATTERN)
+        variations = _extract_tag(pgn, _VAR_PATTERN).fillna("Main Line")
+    else:
+        openings = pd.Series(None, index=pgn.index, dtype=object)
+        variations = pd.Series("Main Line", index=pgn.index, dtype=object)
+    
+    # If no opening tags, classify the game from its first moves instead
+    untagged = openings.isna()
+    if untagged.any():
+        openings[untagged] = _classify_by_moves(pgn[untagged])
+        variations[untagged] = "Main Line"
+    
+    # Create dataframe with opening data, taking result and side from the matching games
     opening_df = pd.DataFrame({
         'Opening': openings,
         'Variation': variations,
-        'Result': results,
-        'Side': sides
-    })
+        'Result': df['Result'] if 'Result' in df.columns else 'Unknown',
+        'Side': df['Side'] if 'Side' in df.columns else 'Unknown'
+    }, index=pgn.index)
+    
+    # Store the labels as categoricals so downstream grouping works on integer codes
+    # (Result arrives lowercased from process_chess_data)
+    for col in ['Opening', 'Variation', 'Result', 'Side']:
+        opening_df[col] = opening_df[col].astype('category')
+    
+    # Order openings by frequency once; grouped tables and charts then come out most-played first
+    opening_df['Opening'] = opening_df['Opening'].cat.reorder_categories(
+        opening_df['Opening'].value_counts().index.tolist()
+    )
+    
+    # Win flag computed once for every win-rate aggregation
+    opening_df['IsWin'] = (opening_df['Result'] == 'win').to_numpy()
     
-    return opening_df
+    return opening_df.reset_index(drop=True)
 
+@st.cache_data(show_spinner=False)
 def create_opening_statistics_table(opening_df):
     """Create detailed opening statistics table with color coding"""
     if opening_df.empty:
         return pd.DataFrame()
     
-    # Calculate statistics for each opening
-    stats = opening_df.groupby('Opening').agg({
-        'Result': 'count',
-        'Variation': 'nunique'
-    }).rename(columns={'Result': 'Games', 'Variation': 'Variations'})
-    
-    # Calculate wins, losses, draws
-    wins = opening_df.groupby('Opening').apply(
-        lambda x: (x['Result'].str.lower() == 'win').sum()
-    )
-    losses = opening_df.groupby('Opening').apply(
-        lambda x: (x['Result'].str.lower() == 'loss').sum()
-    )
-    draws = opening_df.groupby('Opening').apply(
-        lambda x: (x['Result'].str.lower() == 'draw').sum()
+    # Precompute the remaining result and side flags so every statistic is a built-in reduction
+    result = opening_df['Result']
+    side = opening_df['Side'].str.upper()
+    flags = opening_df.assign(
+        _is_loss=(result == 'loss'),
+        _is_draw=(result == 'draw'),
+        _is_white=side.isin(['W', 'WHITE']),
+        _is_black=side.isin(['B', 'BLACK'])
     )
     
-    # Calculate win rates
-    win_rates = opening_df.groupby('Opening').apply(
-        lambda x: (x['Result'].str.lower() == 'win').sum() / len(x) * 100
+    # Calculate statistics for each opening in a single groupby pass
+    stats = flags.groupby('Opening', observed=True).agg(
+        Games=('Result', 'count'),
+        Variations=('Variation', 'nunique'),
+        Wins=('IsWin', 'sum'),
+        Losses=('_is_loss', 'sum'),
+        Draws=('_is_draw', 'sum'),
+        Win_Rate=('IsWin', 'mean'),
+        White=('_is_white', 'sum'),
+        Black=('_is_black', 'sum')
     )
+    # Counts fit int32, halving the table's width (Win_Rate stays float64 so the
+    # rounded percentages display and export exactly)
+    stats = stats.astype({col: 'int32' for col in
+                          ['Games', 'Variations', 'Wins', 'Losses', 'Draws', 'White', 'Black']})
+    stats['Win_Rate'] = (stats['Win_Rate'] * 100).round(1)
     
-    # Calculate side statistics
-    white_games = opening_df.groupby('Opening').apply(
-        lambda x: (x['Side'].str.upper().isin(['W', 'WHITE'])).sum()
-    )
-    black_games = opening_df.groupby('Opening').apply(
-        lambda x: (x['Side'].str.upper().isin(['B', 'BLACK'])).sum()
-    )
-    
-    # Combine all statistics
-    stats['Wins'] = wins
-    stats['Losses'] = losses
-    stats['Draws'] = draws
-    stats['Win_Rate'] = win_rates.round(1)
-    stats['White'] = white_games
-    stats['Black'] = black_games
-    
-    # Sort by total games
-    stats = stats.sort_values('Games', ascending=False)
-    
+    # Openings are already ordered by games played (see extract_opening_data)
     return stats
 
-def create_opening_sunburst(opening_df):
-    """Create interactive sunburst chart"""
-    if opening_df.empty:
-        return go.Figure()
-    
-    # Group by opening and variation
-    tree_data = opening_df.groupby(['Opening', 'Variation']).agg({
-        'Result': 'count'
-    }).reset_index()
-    tree_data.columns = ['Opening', 'Variation', 'Games']
-    
-    # Calculate win rates separately
-    win_rates = opening_df.groupby(['Opening', 'Variation']).apply(
-        lambda x: (x['Result'].str.lower() == 'win').sum() / len(x) * 100
+@st.cache_data(show_spinner=False)
+def _build_tree_data(opening_df):
+    """Games and win rate per opening/variation, with the 'Opening - Variation' node id built once"""
+    # Group by opening and variation, counting games and win rate in one pass
+    tree_data = opening_df.groupby(['Opening', 'Variation'], observed=True).agg(
+        Games=('Result', 'count'),
+        Win_Rate=('IsWin', 'mean')
     ).reset_index()
-    win_rates.columns = ['Opening', 'Variation', 'Win_Rate']
-    
-    # Merge the data
-    tree_data = tree_data.merge(win_rates, on=['Opening', 'Variation'])
+    tree_data['Win_Rate'] *= 100
+    tree_data['_id'] = np.char.add(
+        np.char.add(tree_data['Opening'].to_numpy(dtype=str), ' - '),
+        tree_data['Variation'].to_numpy(dtype=str)
+    )
+    return tree_data
+
+@st.cache_data(show_spinner=False)
+def create_opening_sunburst(tree_data):
+    """Create interactive sunburst chart from the shared opening/variation tree data"""
+    if tree_data.empty:
+        return go.Figure()
     
     # Create sunburst chart
     fig = go.Figure(data=[go.Sunburst(
-        ids=tree_data['Opening'] + ' - ' + tree_data['Variation'],
+        ids=tree_data['_id'],
         labels=tree_data['Variation'],
         parents=tree_data['Opening'],
         values=tree_data['Games'],
@@ -190,29 +190,15 @@ def create_opening_sunburst(opening_df):
     
     return fig
 
-def create_opening_treemap(opening_df):
-    """Create interactive treemap chart"""
-    if opening_df.empty:
+@st.cache_data(show_spinner=False)
+def create_opening_treemap(tree_data):
+    """Create interactive treemap chart from the shared opening/variation tree data"""
+    if tree_data.empty:
         return go.Figure()
     
-    # Group by opening and variation
-    tree_data = opening_df.groupby(['Opening', 'Variation']).agg({
-        'Result': 'count'
-    }).reset_index()
-    tree_data.columns = ['Opening', 'Variation', 'Games']
-    
-    # Calculate win rates separately
-    win_rates = opening_df.groupby(['Opening', 'Variation']).apply(
-        lambda x: (x['Result'].str.lower() == 'win').sum() / len(x) * 100
-    ).reset_index()
-    win_rates.columns = ['Opening', 'Variation', 'Win_Rate']
-    
-    # Merge the data
-    tree_data = tree_data.merge(win_rates, on=['Opening', 'Variation'])
-    
     # Create treemap chart
     fig = go.Figure(data=[go.Treemap(
-        ids=tree_data['Opening'] + ' - ' + tree_data['Variation'],
+        ids=tree_data['_id'],
         labels=tree_data['Variation'],
         parents=tree_data['Opening'],
         values=tree_data['Games'],
@@ -256,6 +242,62 @@ def create_opening_flow(opening_df):
     )
     return fig
 
+@st.fragment
+def _stats_tab(opening_df):
+    """Opening statistics table with its color legend and CSV download"""
+    st.subheader("Opening Statistics")
+    
+    # Show color legend
+    st.markdown("**Win Rate Color Legend:**")
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    with col1:
+        st.markdown("🔴 ≤20%")
+    with col2:
+        st.markdown("🟡 20-35%")
+    with col3:
+        st.markdown("🟡 35-65%")
+    with col4:
+        st.markdown("🟢 65-80%")
+    with col5:
+        st.markdown("🟢 80-95%")
+    with col6:
+        st.markdown("🔵 >95%")
+    
+    # Create and display statistics table
+    stats = create_opening_statistics_table(opening_df)
+    if not stats.empty:
+        st.dataframe(stats, use_container_width=True)
+        
+        # Add download button
+        csv = stats.to_csv(index=True)
+        st.download_button(
+            label="📥 Download Opening Statistics",
+            data=csv,
+            file_name="opening_statistics.csv",
+            mime="text/csv"
+        )
+
+@st.fragment
+def _sunburst_tab(tree_data):
+    """Opening sunburst chart"""
+    st.subheader("Opening Sunburst")
+    st.plotly_chart(create_opening_sunburst(tree_data), use_container_width=True)
+    st.caption("Interactive hierarchical view of openings and variations")
+
+@st.fragment
+def _treemap_tab(tree_data):
+    """Opening treemap chart"""
+    st.subheader("Opening Treemap")
+    st.plotly_chart(create_opening_treemap(tree_data), use_container_width=True)
+    st.caption("Rectangular hierarchical view of opening performance")
+
+@st.fragment
+def _flow_tab(opening_df):
+    """Opening flow diagram"""
+    st.subheader("Opening Flow")
+    st.plotly_chart(create_opening_flow(opening_df), use_container_width=True)
+    st.caption("Flow diagram showing opening transitions (coming soon)")
+
 def create_opening_explorer(df):
     """Create opening explorer interface with all chart types"""
     st.subheader("Opening Analysis")
@@ -271,53 +313,23 @@ def create_opening_explorer(df):
         st.info("No opening data found in PGN. Opening analysis requires PGN data with opening tags.")
         return
     
-    # Create tabs for different visualizations
+    # Opening/variation aggregates shared by the hierarchy charts, limited to the most-played
+    # openings (category codes follow play frequency) to bound the payload sent to the browser
+    tree_data = _build_tree_data(opening_df)
+    tree_data = tree_data[tree_data['Opening'].cat.codes.to_numpy() < MAX_CHART_OPENINGS]
+    
+    # Create tabs for different visualizations; each body is a fragment, so interacting with
+    # one tab (e.g. the download button) reruns only that tab instead of the whole dashboard
     tab1, tab2, tab3, tab4 = st.tabs(["📊 Statistics Table", "🌞 Sunburst", "🗺️ Treemap", "🌊 Flow"])
     
     with tab1:
-        st.subheader("Opening Statistics")
-        
-        # Show color legend
-        st.markdown("**Win Rate Color Legend:**")
-        col1, col2, col3, col4, col5, col6 = st.columns(6)
-        with col1:
-            st.markdown("🔴 ≤20%")
-        with col2:
-            st.markdown("🟡 20-35%")
-        with col3:
-            st.markdown("🟡 35-65%")
-        with col4:
-            st.markdown("🟢 65-80%")
-        with col5:
-            st.markdown("🟢 80-95%")
-        with col6:
-            st.markdown("🔵 >95%")
-        
-        # Create and display statistics table
-        stats = create_opening_statistics_table(opening_df)
-        if not stats.empty:
-            st.dataframe(stats, use_container_width=True)
-            
-            # Add download button
-            csv = stats.to_csv(index=True)
-            st.download_button(
-                label="📥 Download Opening Statistics",
-                data=csv,
-                file_name="opening_statistics.csv",
-                mime="text/csv"
-            )
+        _stats_tab(opening_df)
     
     with tab2:
-        st.subheader("Opening Sunburst")
-        st.plotly_chart(create_opening_sunburst(opening_df), use_container_width=True)
-        st.caption("Interactive hierarchical view of openings and variations")
+        _sunburst_tab(tree_data)
     
     with tab3:
-        st.subheader("Opening Treemap")
-        st.plotly_chart(create_opening_treemap(opening_df), use_container_width=True)
-        st.caption("Rectangular hierarchical view of opening performance")
+        _treemap_tab(tree_data)
     
     with tab4:
-        st.subheader("Opening Flow")
-        st.plotly_chart(create_opening_flow(opening_df), use_container_width=True)
-        st.caption("Flow diagram showing opening transitions (coming soon)")
+        _flow_tab(opening_df)
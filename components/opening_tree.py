@@ -6,8 +6,13 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+import numpy as np
 import re
 
+# Opening/Variation header tags
+_OPENING_RE = re.compile(r'\[Opening\s+"([^"]+)"\]')
+_VARIATION_RE = re.compile(r'\[Variation\s+"([^"]+)"\]')
+
 def create_opening_tree_visualization(df):
     """Create opening tree visualization"""
     st.subheader("Opening Tree Visualization")
@@ -21,38 +26,28 @@ def create_opening_tree_visualization(df):
         st.info("PGN data required for opening tree visualization")
         return
     
-    openings = []
-    variations = []
-    
-    # Extract opening information from PGN
-    opening_pattern = r'\[Opening\s+"([^"]+)"\]'
-    variation_pattern = r'\[Variation\s+"([^"]+)"\]'
-    
-    for pgn in df['PGN']:
-        if pd.isna(pgn) or not pgn:
-            continue
-            
-        opening_match = re.search(opening_pattern, pgn)
-        opening = opening_match.group(1) if opening_match else "Unknown"
-        
-        variation_match = re.search(variation_pattern, pgn)
-        variation = variation_match.group(1) if variation_match else "Main Line"
-        
-        openings.append(opening)
-        variations.append(variation)
+    # Only games with PGN text
+    pgn = df['PGN'].dropna().astype(str)
+    pgn = pgn[pgn.str.len() > 0]
     
-    # Create opening tree data
-    opening_df = pd.DataFrame({'Opening': openings, 'Variation': variations})
+    # Extract opening information from PGN with vectorized extracts; absent tags are null-filled
+    opening_df = pd.DataFrame({
+        'Opening': pgn.str.extract(_OPENING_RE, expand=False).fillna("Unknown"),
+        'Variation': pgn.str.extract(_VARIATION_RE, expand=False).fillna("Main Line")
+    })
     
     if opening_df.empty:
         st.info("No opening data found in PGN")
         return
     
-    # Create tree visualization
-    tree_data = opening_df.groupby(['Opening', 'Variation']).size().reset_index(name='Count')
+    # Create tree visualization, with the 'Opening - Variation' node ids joined in one vectorized pass
+    # (the treemap lays nodes out by size, so the group keys need no alphabetical sort)
+    tree_data = opening_df.groupby(['Opening', 'Variation'], sort=False).size().reset_index(name='Count')
+    node_ids = np.char.add(np.char.add(tree_data['Opening'].to_numpy(dtype=str), ' - '),
+                           tree_data['Variation'].to_numpy(dtype=str))
     
     fig = go.Figure(data=[go.Treemap(
-        ids=tree_data['Opening'] + ' - ' + tree_data['Variation'],
+        ids=node_ids,
         labels=tree_data['Variation'],
         parents=tree_data['Opening'],
         values=tree_data['Count'],
@@ -70,5 +65,7 @@ def create_opening_tree_visualization(df):
     
     # Show opening statistics
     with st.expander("Opening Statistics"):
-        opening_stats = opening_df.groupby('Opening').size().sort_values(ascending=False)
-        st.dataframe(opening_stats.reset_index().rename(columns={0: 'Games'}), use_container_width=True)
+        # Roll the per-variation counts up instead of grouping the games a second time,
+        # sorting only once by games played
+        opening_stats = tree_data.groupby('Opening', sort=False)['Count'].sum().sort_values(ascending=False)
+        st.dataframe(opening_stats.reset_index().rename(columns={'Count': 'Games'}), use_container_width=True)
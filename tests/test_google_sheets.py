@@ -0,0 +1,84 @@
+"""
+Tests for the Google Sheets loader
+"""
+
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+import utils.google_sheets as gs
+
+HEADERS = ['Performance Rating', 'New Rating', '#', 'Date', 'Side', 'Result',
+           'sparkline data', 'Average Centipawn Loss (ACL)', 'Accuracy %',
+           'Game Rating', 'Opponent Name', 'Opponent ELO', 'PGN']
+
+PGN = '''[Event "Club"]
+[Opening "Sicilian Defense"]
+[Variation "Najdorf"]
+
+1. e4 c5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 {A long comment that pads the
+game text over several lines, as annotated club games do} 1-0'''
+
+
+def sheet_csv(n_games):
+    """CSV bytes of a sheet with n_games rows, each carrying a multi-line PGN cell"""
+    rows = [['1500', '1500', str(i), '2024-01-01', 'White', 'Win', '', '30', '85',
+             '1500', f'Opponent {i}', '1400', PGN] for i in range(n_games)]
+    return pd.DataFrame(rows, columns=HEADERS).to_csv(index=False).encode()
+
+
+class FakeResponse:
+    """Streamed response serving the given body"""
+
+    def __init__(self, body=b'', status_code=200, headers=None):
+        self.raw = io.BytesIO(body)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class GetGoogleSheetsDataTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = Path(tempfile.mkdtemp())
+        patches = [mock.patch.object(gs, 'CACHE_DIR', cache_dir),
+                   mock.patch.object(gs, 'SHEET_CACHE', cache_dir / 'sheet.parquet'),
+                   mock.patch.object(gs, 'ETAG_FILE', cache_dir / 'etag.txt')]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_multi_megabyte_sheet_with_multi_line_pgn(self):
+        body = sheet_csv(12000)
+        self.assertGreater(len(body), 3 * 1024 * 1024)
+        with mock.patch.object(gs.requests, 'get', return_value=FakeResponse(body)):
+            df = gs.get_google_sheets_data()
+        self.assertIsNotNone(df)
+        self.assertEqual(df.shape, (12000, 13))
+        self.assertEqual(df['PGN'].iloc[-1], PGN)
+
+    def test_unreadable_cache_on_304_refetches_in_full(self):
+        gs.SHEET_CACHE.write_bytes(b'not parquet')
+        gs.ETAG_FILE.write_text('"v1"')
+        responses = [FakeResponse(status_code=304),
+                     FakeResponse(sheet_csv(3), headers={'ETag': '"v2"'})]
+        with mock.patch.object(gs.requests, 'get', side_effect=responses) as get:
+            df = gs.get_google_sheets_data()
+        self.assertEqual(df.shape, (3, 13))
+        self.assertEqual(get.call_args_list[0].kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertNotIn('headers', get.call_args_list[1].kwargs)
+        # The fresh sheet replaces the broken cache and its ETag
+        self.assertEqual(gs.ETAG_FILE.read_text(), '"v2"')
+        self.assertEqual(pd.read_parquet(gs.SHEET_CACHE).shape, (3, 13))
+
+
+if __name__ == '__main__':
+    unittest.main()
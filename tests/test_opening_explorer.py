@@ -0,0 +1,31 @@
+"""
+Tests for the opening explorer's move-based classification
+"""
+
+import unittest
+
+import pandas as pd
+
+from components.opening_explorer import _classify_by_moves
+
+
+def classify(*pgns):
+    return _classify_by_moves(pd.Series(pgns)).tolist()
+
+
+class ClassifyByMovesTest(unittest.TestCase):
+    def test_move_pairs_and_first_moves(self):
+        self.assertEqual(classify('1. e4 e5 2. Nf3 *', '1. d4 1... Nf6 *', '1. c4 *', '[Event "x"]\n\n*'),
+                         ["Open Game", "Indian Defense", "English Opening", "Standard Opening"])
+
+    def test_nags_are_not_replies(self):
+        self.assertEqual(classify('[Event "x"]\n\n1. e4 $1 e5 *', '1. d4 {good} $2 Nf6 *'),
+                         ["Open Game", "Indian Defense"])
+
+    def test_side_variations_are_skipped(self):
+        self.assertEqual(classify('1. e4 (1. d4 d5) 1... e5 *', '1. e4 (1. d4 (1. c4 c5) d5) c5 *'),
+                         ["Open Game", "Sicilian Defense"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests for the PGN analyzer utilities
+"""
+
+import io
+import os
+import tempfile
+import unittest
+
+import chess.pgn
+import pandas as pd
+
+import utils.pgn_analyzer as pgn_analyzer
+from utils.pgn_analyzer import (PARSE_CHUNKSIZE, analyze_game_quality, analyze_games_batch,
+                                extract_opening_from_pgn, parse_pgn_game, parse_pgn_games,
+                                read_headers_only, scan_archive_openings, strip_to_mainline)
+
+TAGGED = '''[Event "Club"]
+[Opening "Sicilian Defense"]
+[Variation "Najdorf"]
+
+1. e4 c5 2. Nf3 d6 3. d4 cxd4 4. Nxd4 Nf6 5. Nc3 a6 1-0'''
+
+
+class ReadHeadersOnlyTest(unittest.TestCase):
+    def test_one_tag_per_line(self):
+        self.assertEqual(read_headers_only(TAGGED),
+                         {'Event': 'Club', 'Opening': 'Sicilian Defense', 'Variation': 'Najdorf'})
+
+    def test_several_tags_on_one_line(self):
+        pgn = '[Event "F"] [Opening "Ruy Lopez"]\n[Variation "Berlin"]\n\n1. e4 e5 *'
+        self.assertEqual(read_headers_only(pgn), {'Event': 'F', 'Opening': 'Ruy Lopez', 'Variation': 'Berlin'})
+        self.assertEqual(extract_opening_from_pgn(pgn), ('Ruy Lopez', 'Berlin'))
+
+    def test_bom_prefixed_pgn(self):
+        self.assertEqual(extract_opening_from_pgn('\ufeff' + TAGGED), ('Sicilian Defense', 'Najdorf'))
+
+    def test_movetext_is_not_searched(self):
+        pgn = '[Event "x"]\n\n1. e4 {[Opening "Not a tag"]} e5 *'
+        self.assertEqual(extract_opening_from_pgn(pgn), (None, None))
+        crlf = '[Event "x"]\r\n\r\n1. e4 {[Opening "Bogus"]} e5 *'
+        self.assertEqual(extract_opening_from_pgn(crlf), (None, None))
+
+    def test_empty_values_are_missing(self):
+        self.assertEqual(extract_opening_from_pgn('[Opening ""]\n[Variation "V"]\n'), (None, 'V'))
+        self.assertEqual(extract_opening_from_pgn(''), (None, None))
+
+    def test_single_game_and_batch_agree(self):
+        pgns = [TAGGED, '\ufeff' + TAGGED, '[Event "F"] [Opening "Ruy Lopez"]\n\n1. e4 e5 *',
+                '[Event "y"]\r\n[Opening "French"]\r\n\r\n1. e4 e6 *']
+        batch = analyze_games_batch(pgns)
+        for i, pgn in enumerate(pgns):
+            self.assertEqual(analyze_game_quality(pgn), batch.iloc[i].to_dict())
+
+
+class AnalyzeGameQualityTest(unittest.TestCase):
+    def test_move_count_matches_python_chess(self):
+        pgns = [TAGGED, '1. d4 -- 2. c4 *', '1. e4 e5 (1... c5 (1... e6 2. d4) 2. Nf3) 2. Nf3 $1 Nc6 *',
+                '1. e4 {a [%clk 0:10:00] comment} d5 2. exd5 c6 3. dxc6 e5 4. cxb7 Ke7 5. bxa8=Q+ Kf6 *',
+                '1. e4 e5 2. Nf3 Nc6 3. Bc4 Nf6 4. O-O Bc5 5. d3 O-O *']
+        for pgn in pgns:
+            game = chess.pgn.read_game(io.StringIO(pgn))
+            expected = sum(1 for _ in game.mainline_moves())
+            self.assertEqual(analyze_game_quality(pgn)['move_count'], expected, pgn)
+
+    def test_strip_to_mainline_on_text_and_series(self):
+        pgns = ['[Event "x"]\n\n1. e4 $1 (1. d4 (1. c4 c5) d5) e5 {good; (not a line)} *', '1. e4 (unbalanced *']
+        stripped = [strip_to_mainline(pgn) for pgn in pgns]
+        self.assertEqual(stripped[0].split(), ['1.', 'e4', 'e5', '*'])
+        self.assertEqual(strip_to_mainline(pd.Series(pgns)).tolist(), stripped)
+
+    def test_blank_text_is_no_game(self):
+        for pgn in ['', '   ', '\r\n\n', None]:
+            self.assertIsNone(analyze_game_quality(pgn))
+
+
+class ScanArchiveOpeningsTest(unittest.TestCase):
+    def scan(self, text):
+        fd, path = tempfile.mkstemp(suffix='.pgn')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(text.encode())
+        self.addCleanup(os.remove, path)
+        return list(scan_archive_openings(path))
+
+    def test_crlf_comments_are_not_headers(self):
+        archive = ('[Event "a"]\r\n[Opening "A"]\r\n\r\n1. e4 {[Variation "bad"]} e5 *\r\n\r\n'
+                   '[Event "b"]\r\n[Opening "B"]\r\n\r\n1. d4 *\r\n')
+        self.assertEqual(self.scan(archive), [('A', None), ('B', None)])
+
+    def test_games_without_event_tag_are_separate(self):
+        archive = ('[Opening "A"]\n\n1. e4 e5 *\n\n'
+                   '[Opening "C"]\n[Variation "V"]\n\n1. d4 *\n')
+        self.assertEqual(self.scan(archive), [('A', None), ('C', 'V')])
+
+    def test_games_without_movetext(self):
+        self.assertEqual(self.scan('[Opening "A"]\n\n[Opening "B"]\n\n1. c4 *\n'), [('A', None), ('B', None)])
+        self.assertEqual(self.scan(''), [])
+
+
+class ParseErrorsTest(unittest.TestCase):
+    def test_moves_are_none_when_not_needed(self):
+        game = parse_pgn_game(TAGGED, need_moves=False)
+        self.assertIsNone(game.moves)
+        self.assertEqual(game.move_count, 10)
+
+    def test_failures_in_worker_processes_are_counted(self):
+        # Non-text input makes python-chess raise, which counts as a failed game
+        texts = [TAGGED, 1] * PARSE_CHUNKSIZE
+        before = pgn_analyzer.parse_errors
+        games = parse_pgn_games(texts, processes=2)
+        self.assertEqual(pgn_analyzer.parse_errors - before, PARSE_CHUNKSIZE)
+        self.assertEqual([game is None for game in games[:2]], [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,50 @@
 Data processing utilities for Chess Analytics Dashboard
 """
 
+import re
+import time
+
 import pandas as pd
 import numpy as np
+import streamlit as st
+
+from utils.google_sheets import CACHE_DIR
+
+# Opening header tag, compiled once at import
+_OP_RE = re.compile(r'\[Opening\s+"([^"]+)"\]')
+
+# Processed frame persisted across server restarts (versioned with the processed schema)
+PROCESSED_CACHE = CACHE_DIR / 'processed-v2.parquet'
+
+# Normalized results; these lead the Result categories so their codes are 0, 1 and 2
+RESULTS = ['win', 'loss', 'draw']
+
+# Columns every processed frame carries (PGN is appended when the sheet has it)
+PROCESSED_COLUMNS = ['Date', 'Date_only', 'Performance Rating', 'New Rating',
+                     'Side', 'Result', 'ACL',
+                     'Accuracy %', 'Game Rating', 'Opponent Name', 'Opp. ELO']
+
+def load_processed_cache(max_age, columns=None):
+    """Return the processed frame from disk if it was written less than max_age seconds ago"""
+    try:
+        if time.time() - PROCESSED_CACHE.stat().st_mtime < max_age:
+            df = pd.read_parquet(PROCESSED_CACHE, columns=columns, memory_map=True)
+            # Validate the schema once here so callers can index columns directly
+            if set(columns or PROCESSED_COLUMNS).issubset(df.columns):
+                return df
+    except Exception:
+        # Missing or unreadable cache: fall back to a fresh fetch
+        pass
+    return None
+
+def save_processed_cache(df):
+    """Write the processed frame to disk as Snappy-compressed Parquet"""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(PROCESSED_CACHE, compression='snappy', index=False)
+    except Exception:
+        # The cache is only an optimization
+        pass
 
 def process_chess_data(df):
     """Process the raw chess data for analysis"""
@@ -11,10 +53,13 @@ def process_chess_data(df):
         return None
 
     try:
-        # Clean string data and convert date
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].str.strip()
+        # Drop columns the dashboard never shows before doing any per-column work
+        df = df.drop(columns=[c for c in ['#', 'sparkline data'] if c in df.columns])
+
+        # Clean string data in one frame-level pass (pandas 3 reads text as 'str' rather than object)
+        text_cols = [col for col in df.columns
+                     if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])]
+        df[text_cols] = df[text_cols].apply(lambda s: s.str.strip())
 
         # Convert date with error handling
         try:
@@ -26,17 +71,14 @@ def process_chess_data(df):
         # Filter out rows without dates (future/unplayed games)
         df = df[df['Date'].notna()].copy()
 
-        # Convert game number to numeric, ensure it starts from 1
-        df['#'] = pd.to_numeric(df['#'], errors='coerce')
-        df['#'] = df['#'].fillna(0).astype(int) + 1  # Convert to int and add 1 to start from 1
-
-        # Process numeric columns, keeping NaN values for missing data
-        df['Performance Rating'] = pd.to_numeric(df['Performance Rating'], errors='coerce')
-        df['New Rating'] = pd.to_numeric(df['New Rating'], errors='coerce')
-        df['Game Rating'] = pd.to_numeric(df['Game Rating'], errors='coerce')
-        df['Opponent ELO'] = pd.to_numeric(df['Opponent ELO'], errors='coerce')
-        df['Accuracy %'] = pd.to_numeric(df['Accuracy %'], errors='coerce')
-        df['Average Centipawn Loss (ACL)'] = pd.to_numeric(df['Average Centipawn Loss (ACL)'], errors='coerce')
+        # Day-resolution copy of the date for display and day-range comparisons
+        df['Date_only'] = df['Date'].values.astype('datetime64[D]')
+
+        # Process numeric columns in one pass, keeping NaN values for missing data;
+        # float32 halves their width and NaN stays the missing-value marker
+        numeric_cols = ['Performance Rating', 'New Rating', 'Game Rating', 'Opponent ELO',
+                        'Accuracy %', 'Average Centipawn Loss (ACL)']
+        df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce').astype('float32')
         
         # Rename columns for better display
         df.rename(columns={
@@ -44,14 +86,21 @@ def process_chess_data(df):
             'Opponent ELO': 'Opp. ELO'
         }, inplace=True)
 
-        # Keep only the columns we need for visualization
-        # Add 'RESULT' column for the win-loss chart
-        df['RESULT'] = df['Result']  # Create a copy of Result column as RESULT
+        # Normalize Result in place to lowercase categories, win/loss/draw first
+        # (any other values are kept as extra categories rather than dropped)
+        result = df['Result'].str.lower()
+        extra = sorted(set(result.dropna()) - set(RESULTS))
+        df['Result'] = result.astype(pd.CategoricalDtype(RESULTS + extra))
+
+        # Normalize side to a single letter (W/B) so filters compare category codes
+        df['Side'] = df['Side'].str.upper().str[0].astype('category')
+
+        # Store low-cardinality text columns as categoricals to shrink memory
+        for col in ['Opponent Name']:
+            df[col] = df[col].astype('category')
         
         # Include PGN column if it exists (it will, we added it in google_sheets.py)
-        columns_to_keep = ['Date', '#', 'Performance Rating', 'New Rating', 
-                          'Side', 'Result', 'RESULT', 'sparkline data', 'ACL',
-                          'Accuracy %', 'Game Rating', 'Opponent Name', 'Opp. ELO']
+        columns_to_keep = list(PROCESSED_COLUMNS)
         
         # Add PGN column if it exists
         if 'PGN' in df.columns:
@@ -65,6 +114,26 @@ def process_chess_data(df):
         print(f"Error in process_chess_data: {str(e)}")
         return None
 
+def split_pgn(df):
+    """Split the PGN text off the processed frame into a Series keyed by game (row index)"""
+    if df is None or 'PGN' not in df.columns:
+        return df, None
+    return df.drop(columns='PGN'), df['PGN']
+
+def opponent_mask(names, query):
+    """Boolean mask of games whose opponent name contains query, ignoring case"""
+    # Match against the distinct names only, then map back to rows through the category codes
+    categories = names.cat.categories
+    hits = np.flatnonzero(categories.str.lower().str.contains(query.lower(), regex=False))
+    return np.isin(names.cat.codes.to_numpy(), hits)
+
+def frame_fingerprint(df, columns):
+    """Cheap cache key: row count plus a vectorized hash of only the columns a function reads"""
+    present = [c for c in columns if c in df.columns]
+    return len(df), int(pd.util.hash_pandas_object(df[present], index=True).sum())
+
+@st.cache_data(show_spinner=False,
+               hash_funcs={pd.DataFrame: lambda d: frame_fingerprint(d, ['New Rating', 'Result'])})
 def calculate_statistics(df):
     """Calculate various chess statistics"""
     if df is None:
@@ -76,12 +145,14 @@ def calculate_statistics(df):
 
     total_games = len(df)
 
-    # Calculate current rating (most recent non-null rating)
-    current_rating = df.loc[df['New Rating'].notna(), 'New Rating'].iloc[-1] if not df['New Rating'].isna().all() else 0
+    # Calculate current rating (most recent non-null rating) straight from the array
+    ratings = df['New Rating'].to_numpy(dtype=float)
+    rated = np.flatnonzero(~np.isnan(ratings))
+    current_rating = ratings[rated[-1]] if rated.size else 0
 
     # Calculate win percentage
     if total_games > 0:
-        wins = len(df[df['RESULT'].str.lower() == 'win'])  # Case-insensitive comparison
+        wins = int((df['Result'] == 'win').sum())  # Result is lowercased at load
         win_percentage = (wins / total_games) * 100
     else:
         win_percentage = 0
@@ -94,49 +165,30 @@ def calculate_statistics(df):
 
     return stats
 
+@st.cache_data(show_spinner=False,
+               hash_funcs={pd.DataFrame: lambda d: frame_fingerprint(d, ['PGN'])})
 def get_opening_stats(df):
     """Extract opening statistics from PGN data"""
     if df is None or 'PGN' not in df.columns:
         return pd.Series()
     
-    openings = []
-    variations = []
-    
-    # Regular expressions to extract opening and variation info from PGN
-    import re
-    opening_pattern = r'\[Opening\s+"([^"]+)"\]'
-    variation_pattern = r'\[Variation\s+"([^"]+)"\]'
-    
-    for pgn in df['PGN']:
-        if pd.isna(pgn) or not pgn:
-            openings.append(None)
-            variations.append(None)
-            continue
-            
-        # Extract opening
-        opening_match = re.search(opening_pattern, pgn)
-        opening = opening_match.group(1) if opening_match else "Unknown Opening"
-        openings.append(opening)
-        
-        # Extract variation if present
-        variation_match = re.search(variation_pattern, pgn)
-        variation = variation_match.group(1) if variation_match else None
-        variations.append(variation)
-    
-    # Create a new dataframe with the extracted data
-    opening_df = pd.DataFrame({
-        'Opening': openings,
-        'Variation': variations
-    })
+    # Untagged games are not counted, so without any Opening tag there is nothing to do
+    pgn = df['PGN'].dropna().astype(str)
+    if not pgn.str.contains('[Opening', regex=False).any():
+        return pd.Series(dtype='int64')
     
-    # Join with original dataframe to include results
-    df_with_openings = pd.concat([df.reset_index(drop=True), opening_df.reset_index(drop=True)], axis=1)
+    # Extract the Opening tag for every game in one vectorized pass
+    openings = pgn.str.extract(_OP_RE, expand=False)
     
-    # Create opening statistics
-    opening_stats = df_with_openings.groupby('Opening').size()
+    # Count openings over their integer category codes rather than a DataFrame groupby
+    # (games without an Opening tag get code -1 and are left out)
+    opening_cat = pd.Categorical(openings)
+    codes, counts = np.unique(opening_cat.codes, return_counts=True)
+    present = codes >= 0
+    opening_stats = pd.Series(counts[present], index=opening_cat.categories[codes[present]].rename('Opening'))
     opening_stats = opening_stats.sort_values(ascending=False)
     
-    # Filter out None or empty values
-    opening_stats = opening_stats[opening_stats.index.notnull() & (opening_stats.index != 'Unknown Opening')]
+    # Filter out explicit placeholder tags
+    opening_stats = opening_stats[opening_stats.index != 'Unknown Opening']
     
     return opening_stats
@@ -5,7 +5,24 @@ Google Sheets integration for Chess Analytics Dashboard
 import pandas as pd
 import requests
 import streamlit as st
-import io
+from pathlib import Path
+
+# On-disk copy of the last fetched sheet, revalidated against the response ETag
+CACHE_DIR = Path.home() / '.cache' / 'chess_dash'
+SHEET_CACHE = CACHE_DIR / 'sheet.parquet'
+ETAG_FILE = CACHE_DIR / 'etag.txt'
+
+def _save_sheet_cache(df, etag):
+    """Persist the parsed sheet and its ETag for conditional re-fetches"""
+    if not etag:
+        return
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(SHEET_CACHE, index=False)
+        ETAG_FILE.write_text(etag)
+    except Exception:
+        # The cache is only an optimization; a failed write means a full fetch next time
+        pass
 
 def get_google_sheets_data():
     """
@@ -17,12 +34,32 @@ def get_google_sheets_data():
         # Use Query Language to get all data
         URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&gid=0"
 
-        # Fetch the CSV data
-        response = requests.get(URL)
+        # Ask for the CSV only if it changed since the cached copy was fetched
+        request_headers = {}
+        if SHEET_CACHE.exists() and ETAG_FILE.exists():
+            request_headers['If-None-Match'] = ETAG_FILE.read_text().strip()
+
+        # Fetch the CSV data, leaving the body on the socket until it is parsed
+        response = requests.get(URL, headers=request_headers, stream=True)
+        if response.status_code == 304:
+            # Sheet unchanged: reuse the parsed frame from disk
+            try:
+                return pd.read_parquet(SHEET_CACHE)
+            except Exception:
+                # Missing or corrupt cached frame: forget its ETag and fetch the sheet in full,
+                # otherwise every revalidation would keep answering 304 for a cache we can't read
+                response.close()
+                ETAG_FILE.unlink(missing_ok=True)
+                response = requests.get(URL, stream=True)
         response.raise_for_status()  # Raise an exception for bad status codes
 
-        # Read CSV data with all columns as string type
-        df = pd.read_csv(io.StringIO(response.text), dtype=str)
+        # Read CSV data with all columns as string type straight from the response stream
+        # (decode_content undoes any gzip Content-Encoding), so the payload is never held
+        # in memory as both bytes and text. The C parser is used because PGN cells span
+        # several lines: pandas' pyarrow engine can't split quoted newlines across blocks
+        # and fails on sheets past about 1 MB.
+        response.raw.decode_content = True
+        df = pd.read_csv(response.raw, dtype=str, engine='c')
 
         # Check if the dataframe contains columns we need
         if len(df.columns) >= 13:  # Now checking for 13 columns including PGN
@@ -37,37 +74,29 @@ def get_google_sheets_data():
             expected_headers = expected_core_headers.copy()
             expected_headers.append('PGN')  # Add PGN as the 13th column
             
-            # Check if first row matches headers (focusing on the first 12)
-            header_match = True
-            for i in range(min(len(expected_core_headers), len(df.columns))):
-                if i < len(df.columns) and i < len(expected_core_headers):
-                    header_val = str(df.iloc[0][i]).strip().lower()
-                    expected_val = str(expected_core_headers[i]).strip().lower()
-                    if header_val != expected_val:
-                        header_match = False
-                        break
+            # Check if first row matches headers (focusing on the first 12) in one vectorized compare
+            n = min(len(expected_core_headers), len(df.columns))
+            first_row = df.iloc[0, :n].astype(str).str.strip().str.lower().to_numpy()
+            header_match = (first_row == [h.lower() for h in expected_core_headers[:n]]).all()
             
-            # Skip first row only if it matches headers
+            # Skip first row only if it matches headers; shifting the RangeIndex keeps rows
+            # numbered from 0 without the full-frame copy of reset_index
             if header_match:
                 df = df.iloc[1:]
-                df = df.reset_index(drop=True)
+                df.index = df.index - 1
             
             # Check if we have the PGN column (should be the 13th column)
             if len(df.columns) >= 13:
-                actual_cols = list(df.columns)
                 # Assign expected column names to the dataframe, keeping any extra columns
-                new_cols = expected_headers.copy()
-                # Add any extra columns with original names
-                if len(actual_cols) > len(new_cols):
-                    for i in range(len(new_cols), len(actual_cols)):
-                        new_cols.append(actual_cols[i])
-                df.columns = new_cols
+                # under their original names
+                df.columns = expected_headers + list(df.columns[len(expected_headers):])
             else:
                 # If PGN column doesn't exist, use the first 12 columns and add a blank PGN column
                 df = df.iloc[:, :12]
                 df.columns = expected_core_headers
                 df['PGN'] = ''  # Add empty PGN column
 
+            _save_sheet_cache(df, response.headers.get('ETag'))
             return df
 
     except requests.exceptions.RequestException as e:
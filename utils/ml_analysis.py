@@ -4,9 +4,16 @@ Machine Learning analysis for Chess Analytics Dashboard
 
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+import streamlit as st
+from sklearn.cluster import MiniBatchKMeans
 
+from utils.data_processor import frame_fingerprint
+
+# Columns the insights read; only these feed the cache key
+INSIGHT_COLUMNS = ['New Rating', 'Accuracy %', 'ACL', 'Result', 'Side']
+
+@st.cache_data(show_spinner=False,
+               hash_funcs={pd.DataFrame: lambda d: frame_fingerprint(d, INSIGHT_COLUMNS)})
 def generate_performance_insights(df):
     """Generate AI-powered performance insights"""
     if df is None or len(df) < 5:
@@ -19,17 +26,21 @@ def generate_performance_insights(df):
     
     # Basic statistics
     total_games = len(df)
-    wins = len(df[df['RESULT'].str.lower() == 'win'])
-    losses = len(df[df['RESULT'].str.lower() == 'loss'])
-    draws = len(df[df['RESULT'].str.lower() == 'draw'])
+    # Result is lowercased to categories at load, so these are code compares
+    wins = int((df['Result'] == 'win').sum())
+    losses = int((df['Result'] == 'loss').sum())
+    draws = int((df['Result'] == 'draw').sum())
     
     win_rate = (wins / total_games * 100) if total_games > 0 else 0
     
     # Rating analysis
-    if 'New Rating' in df.columns and not df['New Rating'].isna().all():
-        recent_rating = df['New Rating'].iloc[-1]
+    # First and last rated games, located on the raw array so unrated rows are skipped
+    ratings = df['New Rating'].to_numpy(dtype=float) if 'New Rating' in df.columns else np.empty(0)
+    rated = np.flatnonzero(~np.isnan(ratings))
+    if rated.size:
+        recent_rating = ratings[rated[-1]]
         if len(df) >= 10:
-            early_rating = df['New Rating'].iloc[0]
+            early_rating = ratings[rated[0]]
             rating_change = recent_rating - early_rating
             if rating_change > 0:
                 insights.append("📈 Your rating has improved by {} points over your last {} games".format(
@@ -62,12 +73,13 @@ def generate_performance_insights(df):
     
     # Side performance analysis
     if 'Side' in df.columns:
-        white_games = df[df['Side'].str.upper().isin(['W', 'WHITE'])]
-        black_games = df[df['Side'].str.upper().isin(['B', 'BLACK'])]
+        # Side is normalized to W/B at load
+        white_games = df[df['Side'] == 'W']
+        black_games = df[df['Side'] == 'B']
         
         if len(white_games) > 0 and len(black_games) > 0:
-            white_wins = len(white_games[white_games['RESULT'].str.lower() == 'win'])
-            black_wins = len(black_games[black_games['RESULT'].str.lower() == 'win'])
+            white_wins = int((white_games['Result'] == 'win').sum())
+            black_wins = int((black_games['Result'] == 'win').sum())
             
             white_win_rate = (white_wins / len(white_games) * 100) if len(white_games) > 0 else 0
             black_win_rate = (black_wins / len(black_games) * 100) if len(black_games) > 0 else 0
@@ -83,14 +95,17 @@ def generate_performance_insights(df):
     # Performance clustering
     performance_clusters = pd.DataFrame()
     if len(df) >= 5 and 'Accuracy %' in df.columns and 'ACL' in df.columns:
-        # Prepare data for clustering
-        cluster_data = df[['Accuracy %', 'ACL']].dropna()
+        # Prepare data for clustering (as float64 so the rounded cluster means display cleanly)
+        cluster_data = df[['Accuracy %', 'ACL']].dropna().astype(float)
         if len(cluster_data) >= 3:
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(cluster_data)
+            # Standardize the two features inline (constant columns keep unit scale)
+            values = cluster_data.to_numpy(dtype=float)
+            std = values.std(axis=0)
+            std[std == 0] = 1
+            scaled_data = (values - values.mean(axis=0)) / std
             
             # Perform clustering
-            kmeans = KMeans(n_clusters=min(3, len(cluster_data)), random_state=42)
+            kmeans = MiniBatchKMeans(n_clusters=min(3, len(cluster_data)), batch_size=256, n_init=3, random_state=42)
             cluster_data['Cluster'] = kmeans.fit_predict(scaled_data)
             
             # Analyze clusters
@@ -4,76 +4,290 @@ PGN analyzer utilities for Chess Analytics Dashboard
 
 import pandas as pd
 import re
+import sys
 import chess.pgn
 import io
+import logging
+import mmap
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import Pool
 
-def parse_pgn_game(pgn_text):
-    """Parse a single PGN game and extract metadata"""
+logger = logging.getLogger(__name__)
+
+# Games that failed to parse since import, including those parsed in parse_pgn_games'
+# worker processes (details are logged at DEBUG level); updated under _parse_errors_lock
+parse_errors = 0
+_parse_errors_lock = threading.Lock()
+
+def _count_parse_errors(n=1):
+    """Add n failed games to parse_errors"""
+    global parse_errors
+    with _parse_errors_lock:
+        parse_errors += n
+
+# Header tags, brace comments, rest-of-line comments and NAGs ($1), none of which are moves
+_NON_MOVE_RE = re.compile(r'\[[^\]]*\]|\{[^}]*\}|;[^\n]*|\$\d+')
+# Innermost parenthesized side variation (applied repeatedly to unwrap nesting)
+_SIDELINE_RE = re.compile(r'\([^()]*\)')
+# One move in SAN, e.g. e4, Nbxd7+, exd8=Q#, O-O-O, or a null move (--)
+_SAN_RE = re.compile(r'[KQRBN]?[a-h]?[1-8]?x?[a-h][1-8](?:=[QRBN])?|[O0]-[O0](?:-[O0])?|--')
+# Any header tag as a (name, value) pair
+_TAG_RE = re.compile(r'\[(\w+)\s+"([^"]*)"\]')
+# Blank line closing the header block, with LF or CRLF line endings
+_BLANK_LINE_RE = re.compile(r'\r?\n[ \t]*\r?\n')
+# Opening/Variation tags, the blank line after a header block, and the blank line before the
+# next game's first tag, in raw archive bytes (LF or CRLF)
+_OPENING_BYTES_RE = re.compile(rb'\[Opening\s+"([^"]+)"\]')
+_VARIATION_BYTES_RE = re.compile(rb'\[Variation\s+"([^"]+)"\]')
+_BLANK_LINE_BYTES_RE = re.compile(rb'\r?\n[ \t]*\r?\n')
+_NEXT_GAME_BYTES_RE = re.compile(rb'\r?\n[ \t]*\r?\n[ \t]*(?=\[)')
+
+# Games handed to each worker process at a time, amortizing the pickling round trip
+PARSE_CHUNKSIZE = 64
+
+# Game length buckets by half-move count: under 20, under 40, and the rest
+GAME_LENGTH_BINS = [0, 20, 40, float('inf')]
+GAME_LENGTH_LABELS = ['Short', 'Medium', 'Long']
+
+# One reusable board per thread for games from the standard starting position
+_boards = threading.local()
+
+def _start_board(game):
+    """Board at the game's starting position, reusing this thread's board when possible"""
+    # Games with a FEN header (or a chess variant) set up their own starting position
+    if 'FEN' in game.headers or 'Variant' in game.headers:
+        return game.board()
+    board = getattr(_boards, 'board', None)
+    if board is None:
+        board = _boards.board = chess.Board()
+    else:
+        board.reset()
+    return board
+
+def _collect_moves(game):
+    """SAN of every mainline move, as a tuple"""
+    # san_and_push renders each move while making it, where san() would push and pop the
+    # move once more just to test for check; the bound method is looked up once
+    san_and_push = _start_board(game).san_and_push
+    return tuple([san_and_push(move) for move in game.mainline_moves()])
+
+# Header fields reported by parse_pgn_game, as (field, PGN tag)
+GAME_HEADERS = [('event', 'Event'), ('site', 'Site'), ('date', 'Date'), ('white', 'White'),
+                ('black', 'Black'), ('result', 'Result'), ('opening', 'Opening'), ('variation', 'Variation')]
+
+@dataclass(slots=True)
+class ParsedGame:
+    """Metadata of one parsed game (moves is None when only the count was requested)"""
+    event: str
+    site: str
+    date: str
+    white: str
+    black: str
+    result: str
+    opening: str
+    variation: str
+    moves: list | None
+    move_count: int
+
+# Read buffer for PGN archive files
+ARCHIVE_BUFFER_SIZE = 1 << 20
+
+def _game_fields(game, need_moves):
+    """Headers, moves and move count of a parsed game, as immutable tuples"""
+    # Extract game headers, interned since events, openings and results repeat across games
+    headers = tuple(sys.intern(game.headers.get(tag, '')) for _, tag in GAME_HEADERS)
+    
+    # Extract moves
+    if need_moves:
+        moves = _collect_moves(game)
+        move_count = len(moves)
+    else:
+        # Count only: no board replay or SAN strings
+        moves = None
+        move_count = sum(1 for _ in game.mainline_moves())
+    
+    return headers, moves, move_count
+
+def _parsed_game(fields):
+    """Fresh ParsedGame (and move list) from a game's fields"""
+    headers, moves, move_count = fields
+    return ParsedGame(*headers, list(moves) if moves is not None else None, move_count)
+
+@lru_cache(maxsize=4096)
+def _parse_cached(pgn_text, need_moves):
+    """Parse one PGN text once, keeping its fields for repeated calls"""
+    game = chess.pgn.read_game(io.StringIO(pgn_text))
+    if game is None:
+        return None
+    return _game_fields(game, need_moves)
+
+def parse_pgn_game(pgn_text, need_moves=True):
+    """Parse a single PGN game and extract metadata (moves is None unless need_moves)"""
     try:
-        game = chess.pgn.read_game(io.StringIO(pgn_text))
-        if game is None:
+        # Repeated texts (reruns, re-filters) are served from the parse cache
+        parsed = _parse_cached(pgn_text, need_moves)
+        if parsed is None:
             return None
-        
-        # Extract game headers
-        headers = game.headers
-        
-        # Extract moves
-        moves = []
-        board = game.board()
-        for move in game.mainline_moves():
-            moves.append(board.san(move))
-            board.push(move)
-        
-        return {
-            'event': headers.get('Event', ''),
-            'site': headers.get('Site', ''),
-            'date': headers.get('Date', ''),
-            'white': headers.get('White', ''),
-            'black': headers.get('Black', ''),
-            'result': headers.get('Result', ''),
-            'opening': headers.get('Opening', ''),
-            'variation': headers.get('Variation', ''),
-            'moves': moves,
-            'move_count': len(moves)
-        }
-    except Exception as e:
-        print(f"Error parsing PGN: {e}")
+        # Fresh record per call, so callers can't mutate the cached entry
+        return _parsed_game(parsed)
+    except Exception:
+        # Malformed games are common in bulk archives; count them quietly instead of printing
+        _count_parse_errors()
+        logger.debug("Error parsing PGN", exc_info=True)
         return None
 
-def extract_opening_from_pgn(pgn_text):
-    """Extract opening information from PGN text"""
-    if not pgn_text:
-        return None, None
+def iter_games(source, need_moves=True):
+    """Yield a ParsedGame for every game in a PGN archive (a file path or open text stream)"""
+    # Read games straight off a buffered handle rather than splitting the archive into strings
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding='utf-8', errors='replace', buffering=ARCHIVE_BUFFER_SIZE) as fp:
+            yield from iter_games(fp, need_moves)
+        return
     
-    # Try to extract from headers first
-    opening_match = re.search(r'\[Opening\s+"([^"]+)"\]', pgn_text)
-    variation_match = re.search(r'\[Variation\s+"([^"]+)"\]', pgn_text)
+    while (game := chess.pgn.read_game(source)) is not None:
+        try:
+            game_data = _parsed_game(_game_fields(game, need_moves))
+        except Exception:
+            # Skip games python-chess can't replay, counted as in parse_pgn_game
+            _count_parse_errors()
+            logger.debug("Error parsing PGN game in archive", exc_info=True)
+            continue
+        yield game_data
+
+def _header_end(pgn_text):
+    """Offset of the blank line closing the header block (the whole text if none is found)"""
+    blank = _BLANK_LINE_RE.search(pgn_text, max(pgn_text.find('['), 0))
+    return blank.start() if blank else len(pgn_text)
+
+def read_headers_only(pgn_text):
+    """Header tags of a PGN game as a dict, read without building the python-chess game tree"""
+    tags = {}
+    if not pgn_text:
+        return tags
     
-    opening = opening_match.group(1) if opening_match else None
-    variation = variation_match.group(1) if variation_match else None
+    # Match every tag in the header block with one compiled pattern (several tags may share
+    # a line); the first occurrence of a repeated tag wins
+    for name, value in _TAG_RE.findall(pgn_text, 0, _header_end(pgn_text)):
+        tags.setdefault(name, value)
+    return tags
+
+def scan_archive_openings(path):
+    """Yield (opening, variation) for every game in a PGN archive file, scanning raw bytes
+
+    As in standard PGN exports, each game's header block ends at a blank line and the next
+    game starts at the first tag line that follows a blank line (with or without an Event tag).
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        # Map the file and search it in place: nothing is decoded except the tag values
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = mm.find(b'[')
+            while pos != -1:
+                # Only the header block is searched (up to the blank line before the moves)
+                blank = _BLANK_LINE_BYTES_RE.search(mm, pos)
+                header_end = blank.start() if blank else len(mm)
+                
+                opening = _OPENING_BYTES_RE.search(mm, pos, header_end)
+                variation = _VARIATION_BYTES_RE.search(mm, pos, header_end)
+                yield (opening.group(1).decode('utf-8', 'replace') if opening else None,
+                       variation.group(1).decode('utf-8', 'replace') if variation else None)
+                
+                # The next game begins at a tag after a blank line; searching from this header's
+                # own blank line also covers games without movetext
+                next_game = _NEXT_GAME_BYTES_RE.search(mm, header_end) if blank else None
+                pos = next_game.end() if next_game else -1
+
+def extract_opening_from_pgn(pgn_text):
+    """Extract opening information from PGN text"""
+    # Only the header block is read; empty tag values count as missing
+    tags = read_headers_only(pgn_text)
+    return tags.get('Opening') or None, tags.get('Variation') or None
+
+def strip_to_mainline(pgn):
+    """Blank out header tags, comments, NAGs and side variations of a PGN text or Series of texts"""
+    # Side variations are dropped from the innermost outwards so only the mainline remains
+    if isinstance(pgn, pd.Series):
+        movetext = pgn.str.replace(_NON_MOVE_RE, ' ', regex=True)
+        while movetext.str.contains('(', regex=False).any():
+            unwrapped = movetext.str.replace(_SIDELINE_RE, ' ', regex=True)
+            if unwrapped.equals(movetext):
+                break  # Unbalanced parentheses
+            movetext = unwrapped
+        return movetext
     
-    return opening, variation
+    movetext = _NON_MOVE_RE.sub(' ', pgn)
+    while '(' in movetext:
+        unwrapped = _SIDELINE_RE.sub(' ', movetext)
+        if unwrapped == movetext:
+            break  # Unbalanced parentheses
+        movetext = unwrapped
+    return movetext
+
+def _fast_move_count(pgn_text):
+    """Count mainline half-moves by matching SAN tokens, without replaying the game"""
+    return len(_SAN_RE.findall(strip_to_mainline(pgn_text)))
 
 def analyze_game_quality(pgn_text):
     """Analyze game quality from PGN"""
-    game_data = parse_pgn_game(pgn_text)
-    if not game_data:
+    # Blank text holds no game (python-chess reads nothing from it either)
+    if not pgn_text or not pgn_text.strip():
         return None
     
-    # Basic quality metrics
-    move_count = game_data['move_count']
+    # Only the move count and opening tags are needed, so skip the full board replay
+    move_count = _fast_move_count(pgn_text)
+    opening, variation = extract_opening_from_pgn(pgn_text)
     
-    # Categorize game length
-    if move_count < 20:
-        game_length = "Short"
-    elif move_count < 40:
-        game_length = "Medium"
-    else:
-        game_length = "Long"
+    # Categorize game length by indexing the labels with the number of thresholds reached
+    game_length = GAME_LENGTH_LABELS[(move_count >= GAME_LENGTH_BINS[1]) + (move_count >= GAME_LENGTH_BINS[2])]
     
     return {
         'move_count': move_count,
         'game_length': game_length,
-        'opening': game_data['opening'],
-        'variation': game_data['variation']
+        'opening': opening or '',
+        'variation': variation or ''
     }
+
+def analyze_games_batch(pgn_texts):
+    """Analyze many games at once, one row per PGN text (columns as in analyze_game_quality)"""
+    pgn = pd.Series(pgn_texts, dtype=object).fillna('').astype(str)
+    
+    # Header tags of every game, read the same way as for a single game
+    tags = [read_headers_only(text) for text in pgn]
+    openings = [sys.intern(t.get('Opening', '')) for t in tags]
+    variations = [sys.intern(t.get('Variation', '')) for t in tags]
+    
+    # Count mainline moves for all games with vectorized string ops
+    move_count = strip_to_mainline(pgn).str.count(_SAN_RE)
+    
+    return pd.DataFrame({
+        'move_count': move_count,
+        'game_length': pd.cut(move_count, bins=GAME_LENGTH_BINS, labels=GAME_LENGTH_LABELS, right=False),
+        'opening': openings,
+        'variation': variations
+    }, index=pgn.index)
+
+def _parse_in_worker(pgn_text):
+    """parse_pgn_game in a worker process, also reporting whether the game failed to parse"""
+    before = parse_errors
+    game = parse_pgn_game(pgn_text)
+    return game, parse_errors - before
+
+def parse_pgn_games(pgn_texts, processes=None):
+    """Parse many PGN games across worker processes, in input order (None where parsing fails)"""
+    pgn_texts = list(pgn_texts)
+    processes = processes or os.cpu_count() or 1
+    
+    # Small batches or a single core aren't worth the process start-up and pickling
+    if processes == 1 or len(pgn_texts) < 2 * PARSE_CHUNKSIZE:
+        return [parse_pgn_game(text) for text in pgn_texts]
+    
+    with Pool(processes) as pool:
+        outcomes = list(pool.imap(_parse_in_worker, pgn_texts, chunksize=PARSE_CHUNKSIZE))
+    
+    # Workers count failures in their own copy of the module; fold them into this process
+    _count_parse_errors(sum(failed for _, failed in outcomes))
+    return [game for game, _ in outcomes]